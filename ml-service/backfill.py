@@ -0,0 +1,331 @@
+"""
+Offline bulk extraction over a local directory of reports
+
+Walks a directory of PDFs and images, runs PDFService / OCRService across a
+process pool (one EasyOCR model per worker) and appends one JSON line per file
+to the output. The output file doubles as the checkpoint: re-running the same
+command skips files that already succeeded, so a crashed backfill resumes
+where it stopped. Failed files are retried on resume and get another line,
+so a path can appear more than once; the last record for a path wins.
+A worker that dies (OOM, native crash) is replaced without stopping the run;
+the reports it had in flight are re-run one at a time and only the report
+that kills a worker on its own is recorded as failed. If workers cannot even
+start (model download or import failure), the run stops with an error
+instead of recording every report as failed.
+
+Usage:
+    python backfill.py reports/ -o results.jsonl --workers 4 --report-type blood_test
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Set
+
+from services import runtime
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('backfill')
+
+PDF_EXTENSIONS = {'.pdf'}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.webp'}
+
+# Per-worker services, created once by _init_worker
+_ocr_service = None
+_pdf_service = None
+
+
+def _init_worker(tiling: Optional[bool], threads_per_worker: int, log_level: str):
+    """Load one shared EasyOCR model per worker process"""
+    global _ocr_service, _pdf_service
+    logging.getLogger().setLevel(log_level)
+
+    # Before the model import so OpenMP / BLAS pick up the budget
+    runtime.configure_threads(threads_per_worker)
+
+    from services.ocr_service import OCRService
+    from services.pdf_service import PDFService
+
+    # Files are already processed in parallel, so tiles run one at a time
+    _ocr_service = OCRService(tiling=tiling, tile_workers=1)
+    _pdf_service = PDFService(ocr_service=_ocr_service)
+
+
+def _worker_ready() -> int:
+    """Trivial task used to check that a new pool's workers initialised"""
+    return os.getpid()
+
+
+def _process_file(input_dir: str, rel_path: str, report_type: str) -> Dict[str, Any]:
+    """Extract one report; errors are returned as records rather than raised"""
+    start_time = time.time()
+    record = {'path': rel_path, 'reportType': report_type, 'worker': os.getpid()}
+    try:
+        with open(os.path.join(input_dir, rel_path), 'rb') as f:
+            content = f.read()
+
+        if os.path.splitext(rel_path)[1].lower() in PDF_EXTENSIONS:
+            data = _pdf_service.extract_from_pdf_bytes(content, report_type)
+        else:
+            data = _ocr_service.extract_from_image_bytes(content, report_type)
+
+        if data.get('error'):
+            # e.g. image-only PDFs: the services report these instead of raising
+            record.update(success=False, error=data['error'], data=data)
+        else:
+            record.update(success=True, data=data)
+    except Exception as e:
+        record.update(success=False, error=f"{type(e).__name__}: {str(e)}")
+    record['processingTime'] = (time.time() - start_time) * 1000
+    return record
+
+
+def find_reports(input_dir: str) -> List[str]:
+    """Report files under input_dir, as sorted paths relative to it"""
+    extensions = PDF_EXTENSIONS | IMAGE_EXTENSIONS
+    reports = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in extensions:
+                reports.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(reports)
+
+
+def load_completed(output_path: str) -> Set[str]:
+    """Paths whose last record in the output file is a success"""
+    last_success: Dict[str, bool] = {}
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial line from a crash mid-write
+            last_success[record['path']] = bool(record.get('success'))
+    return {path for path, success in last_success.items() if success}
+
+
+def _open_output(output_path: str, resume: bool):
+    """Open the output for appending, terminating any partial last line"""
+    if not resume or not os.path.exists(output_path):
+        return open(output_path, 'w')
+    out = open(output_path, 'a+')
+    if out.tell() > 0:
+        out.seek(out.tell() - 1)
+        if out.read(1) != '\n':
+            out.write('\n')
+    return out
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def run_backfill(
+    input_dir: str,
+    output_path: str,
+    report_type: str = 'blood_test',
+    workers: int = 1,
+    threads_per_worker: Optional[int] = None,
+    tiling: Optional[bool] = None,
+    resume: bool = True,
+    progress_interval: float = 10.0,
+    worker_log_level: str = 'WARNING'
+) -> Dict[str, Any]:
+    """
+    Run extraction over every report in input_dir
+
+    Args:
+        input_dir: Directory searched recursively for PDFs and images
+        output_path: JSONL file that receives one record per report
+        report_type: Report type passed to the parsers
+        workers: Number of worker processes (one EasyOCR model each)
+        threads_per_worker: torch / OpenMP / OpenCV threads per worker (default: cores / workers)
+        tiling: Force tiled OCR on/off; None keeps the size-based default
+        resume: Skip reports that already succeeded in output_path
+        progress_interval: Seconds between throughput/ETA log lines
+        worker_log_level: Log level inside workers (per-file logs are noisy)
+
+    Returns:
+        Summary with processed, failed and skipped counts
+
+    Raises:
+        RuntimeError: If worker processes fail to initialise
+    """
+    reports = find_reports(input_dir)
+    completed = load_completed(output_path) if resume else set()
+    pending = [path for path in reports if path not in completed]
+    logger.info(
+        f"Found {len(reports)} reports, {len(completed)} already done, {len(pending)} to process"
+    )
+
+    threads_per_worker = threads_per_worker or runtime.threads_per_worker(workers)
+    summary = {'processed': 0, 'failed': 0, 'skipped': len(reports) - len(pending)}
+    if not pending:
+        return summary
+
+    start_time = time.time()
+    last_report = start_time
+    max_in_flight = workers * 4  # Bound memory while keeping workers busy
+
+    def new_pool():
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(tiling, threads_per_worker, worker_log_level)
+        )
+        # A failing initializer also surfaces as BrokenProcessPool, which would
+        # otherwise look like every report crashing its worker
+        try:
+            pool.submit(_worker_ready).result()
+        except BrokenProcessPool:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise RuntimeError("Worker processes failed to initialise; see the worker error above")
+        return pool
+
+    def write_record(record):
+        out.write(json.dumps(record, default=str) + '\n')
+        summary['processed'] += 1
+        if not record['success']:
+            summary['failed'] += 1
+            logger.warning(f"Failed {record['path']}: {record['error']}")
+
+    with _open_output(output_path, resume) as out:
+        executor = new_pool()
+        queue = iter(pending)
+        in_flight = {}  # future -> relative path
+        isolate = []  # Reports from a crashed batch, re-run one at a time
+        try:
+            while True:
+                if isolate:
+                    if not in_flight:
+                        rel_path = isolate.pop(0)
+                        in_flight[executor.submit(_process_file, input_dir, rel_path, report_type)] = rel_path
+                else:
+                    for rel_path in queue:
+                        future = executor.submit(_process_file, input_dir, rel_path, report_type)
+                        in_flight[future] = rel_path
+                        if len(in_flight) >= max_in_flight:
+                            break
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                pool_broken = False
+                for future in done:
+                    rel_path = in_flight.pop(future)
+                    try:
+                        write_record(future.result())
+                    except BrokenProcessPool:
+                        pool_broken = True
+                        in_flight[future] = rel_path
+
+                if pool_broken:
+                    # A worker died (OOM, segfault in torch/OpenCV) and took the
+                    # pool with it. A lone report is the culprit; a batch is
+                    # re-run one report at a time to find it.
+                    if len(in_flight) == 1:
+                        rel_path = next(iter(in_flight.values()))
+                        write_record({
+                            'path': rel_path,
+                            'reportType': report_type,
+                            'success': False,
+                            'error': "BrokenProcessPool: worker process died while processing this report"
+                        })
+                    else:
+                        logger.error(
+                            f"Worker process died with {len(in_flight)} reports in flight; "
+                            f"re-running them one at a time"
+                        )
+                        isolate.extend(in_flight.values())
+                    in_flight = {}
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = new_pool()
+                out.flush()
+
+                now = time.time()
+                if now - last_report >= progress_interval:
+                    os.fsync(out.fileno())
+                    last_report = now
+                    elapsed = now - start_time
+                    rate = summary['processed'] / elapsed
+                    remaining = len(pending) - summary['processed']
+                    eta = _format_duration(remaining / rate) if rate > 0 else '?'
+                    logger.info(
+                        f"{summary['processed']}/{len(pending)} processed "
+                        f"({summary['failed']} failed), {rate:.2f} reports/s, ETA {eta}"
+                    )
+        except KeyboardInterrupt:
+            logger.warning("Interrupted, waiting for running reports to finish; re-run to resume")
+            for future in in_flight:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            out.flush()
+            os.fsync(out.fileno())
+
+    elapsed = time.time() - start_time
+    summary['elapsed'] = round(elapsed, 2)
+    logger.info(
+        f"Backfill complete: {summary['processed']} processed ({summary['failed']} failed), "
+        f"{summary['skipped']} skipped in {_format_duration(elapsed)} "
+        f"({summary['processed'] / elapsed:.2f} reports/s)"
+    )
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-extract health data from a local directory of reports")
+    parser.add_argument('input_dir', help="Directory of PDFs and images (searched recursively)")
+    parser.add_argument('-o', '--output', default='backfill.jsonl', help="JSONL output / checkpoint file")
+    parser.add_argument('--report-type', default='blood_test', help="Report type passed to the parsers")
+    parser.add_argument('-w', '--workers', type=int, default=max(1, runtime.available_cores() // 2),
+                        help="Worker processes, each loading one EasyOCR model")
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="torch / OpenMP / OpenCV threads per worker (default: cores / workers)")
+    parser.add_argument('--tiling', choices=['auto', 'on', 'off'], default='auto',
+                        help="Tiled OCR for large images")
+    parser.add_argument('--no-resume', action='store_true',
+                        help="Overwrite the output instead of skipping completed reports")
+    parser.add_argument('--progress-interval', type=float, default=10.0,
+                        help="Seconds between progress log lines")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a directory")
+
+    tiling = {'auto': None, 'on': True, 'off': False}[args.tiling]
+    try:
+        summary = run_backfill(
+            args.input_dir,
+            args.output,
+            report_type=args.report_type,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            tiling=tiling,
+            resume=not args.no_resume,
+            progress_interval=args.progress_interval
+        )
+    except KeyboardInterrupt:
+        return 130
+    except RuntimeError as e:
+        logger.error(f"Backfill aborted: {str(e)}")
+        return 2
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Closed-loop load generator for measuring requests/second per node
+
+Keeps --concurrency requests in flight for --duration seconds and reports
+throughput and latency percentiles. Run it against serve.py with different
+--workers values to see how throughput scales with the worker count.
+
+Usage:
+    python bench.py --file-url https://.../report.jpg --concurrency 16 --duration 60
+    python bench.py --endpoint /health --concurrency 64   # framework overhead only
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure requests/second against the OCR service")
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--endpoint', default='/extract-report')
+    parser.add_argument('--file-url', help="Report URL sent to /extract-report")
+    parser.add_argument('--report-type', default='blood_test')
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    parser.add_argument('-d', '--duration', type=float, default=30.0, help="Seconds to run")
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args(argv)
+
+    url = args.base_url.rstrip('/') + args.endpoint
+    if args.endpoint == '/extract-report':
+        if not args.file_url:
+            parser.error("--file-url is required for /extract-report")
+        payload = {'fileUrl': args.file_url, 'reportType': args.report_type}
+    else:
+        payload = None
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.duration
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if payload is None:
+                    response = session.get(url, timeout=args.timeout)
+                else:
+                    response = session.post(url, json=payload, timeout=args.timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    print(f"Benchmarking {url} with {args.concurrency} clients for {args.duration:.0f}s")
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.concurrency):
+            executor.submit(client)
+    wall_time = time.monotonic() - started
+
+    print(f"Requests:    {len(latencies)} ok, {errors[0]} failed")
+    print(f"Throughput:  {len(latencies) / wall_time:.2f} req/s")
+    print(
+        f"Latency ms:  p50 {_percentile(latencies, 50):.1f}  "
+        f"p95 {_percentile(latencies, 95):.1f}  p99 {_percentile(latencies, 99):.1f}"
+    )
+    return 1 if errors[0] and not latencies else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, HttpUrl, Field
 import uvicorn
 from typing import Optional, Dict, Any
+from contextlib import nullcontext
 import logging
+import os
+import secrets
 
 from services.ocr_service import OCRService
 from services.pdf_service import PDFService
+from services.profiling_service import ProfilingService
 
 # Configure logging
 logging.basicConfig(
@@ -33,12 +38,33 @@ app.add_middleware(
 
 # Initialize services
 ocr_service = OCRService()
-pdf_service = PDFService()
+pdf_service = PDFService(ocr_service=ocr_service)
+profiling_service = ProfilingService(
+    output_dir=os.getenv('PROFILE_DIR', 'profiles'),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+)
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def is_admin(x_admin_token: Optional[str]) -> bool:
+    """Whether the token matches ADMIN_TOKEN (always False when unset)"""
+    if not ADMIN_TOKEN or not x_admin_token:
+        return False
+    return secrets.compare_digest(x_admin_token, ADMIN_TOKEN)
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check the X-Admin-Token header against ADMIN_TOKEN"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
 
 # Request/Response models
 class ReportExtractionRequest(BaseModel):
     fileUrl: HttpUrl
     reportType: str = "blood_test"
+    profile: bool = False  # Record a cProfile/tracemalloc profile (needs X-Admin-Token)
 
 class ReportExtractionResponse(BaseModel):
     success: bool
@@ -46,6 +72,10 @@ class ReportExtractionResponse(BaseModel):
     data: Optional[Dict[str, Any]] = None
     confidence: Optional[float] = None
     processingTime: Optional[float] = None
+    profileId: Optional[str] = None
+
+class ProfilingConfig(BaseModel):
+    sampleRate: float = Field(ge=0.0, le=1.0)
 
 @app.get("/")
 async def root():
@@ -65,6 +95,7 @@ async def health_check():
     """Detailed health check"""
     return {
         "status": "healthy",
+        "worker": os.getpid(),
         "services": {
             "ocr": "operational",
             "pdf_processing": "operational"
@@ -72,7 +103,7 @@ async def health_check():
     }
 
 @app.post("/extract-report", response_model=ReportExtractionResponse)
-async def extract_report(request: ReportExtractionRequest):
+async def extract_report(request: ReportExtractionRequest, x_admin_token: Optional[str] = Header(None)):
     """
     Extract health data from medical report
     
@@ -98,12 +129,30 @@ async def extract_report(request: ReportExtractionRequest):
         # Determine if it's a PDF or image
         is_pdf = file_url.lower().endswith('.pdf')
         
-        if is_pdf:
-            # Process PDF
-            extracted_data = await pdf_service.extract_from_pdf(file_url, report_type)
+        # Profiling is opt-in per request (admins only) or by sampling rate
+        profile_requested = request.profile and is_admin(x_admin_token)
+        if request.profile and not profile_requested:
+            logger.warning("Ignoring profile request without a valid admin token")
+        
+        if profiling_service.should_profile(profile_requested):
+            profile_context = profiling_service.profile(f"{'pdf' if is_pdf else 'image'}:{report_type}")
         else:
-            # Process image
-            extracted_data = await ocr_service.extract_from_image(file_url, report_type)
+            profile_context = nullcontext()
+        
+        # cProfile records everything on this thread, including other requests
+        # the event loop runs while we're suspended. The extraction calls are
+        # async only in name (download and OCR are synchronous), so nothing
+        # inside this block may await a real I/O point; if they ever do,
+        # switch them to run_in_executor or the profile will mix requests.
+        with profile_context as profile_run:
+            if is_pdf:
+                # Process PDF
+                extracted_data = await pdf_service.extract_from_pdf(file_url, report_type)
+            else:
+                # Process image
+                extracted_data = await ocr_service.extract_from_image(file_url, report_type)
+        
+        profile_id = profile_run.profile_id if profile_run else None
         
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
         
@@ -114,7 +163,8 @@ async def extract_report(request: ReportExtractionRequest):
             message="Report processed successfully",
             data=extracted_data,
             confidence=extracted_data.get('confidence', 0),
-            processingTime=processing_time
+            processingTime=processing_time,
+            profileId=profile_id
         )
         
     except Exception as e:
@@ -142,7 +192,53 @@ async def test_ocr():
             "error": str(e)
         }
 
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def get_profiling_config():
+    """Current profiling configuration"""
+    return {
+        "success": True,
+        "sampleRate": profiling_service.sample_rate
+    }
+
+@app.put("/admin/profiling", dependencies=[Depends(require_admin)])
+async def update_profiling_config(config: ProfilingConfig):
+    """Change the profiling sample rate without a redeploy"""
+    profiling_service.set_sample_rate(config.sampleRate)
+    logger.info(f"Profiling sample rate set to {config.sampleRate}")
+    return {
+        "success": True,
+        "sampleRate": profiling_service.sample_rate
+    }
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """List stored profiles, newest first"""
+    return {
+        "success": True,
+        "profiles": profiling_service.list_profiles()
+    }
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """Profile summary: top functions by cumulative time and top allocation sites"""
+    summary = profiling_service.get_summary(profile_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return {
+        "success": True,
+        "profile": summary
+    }
+
+@app.get("/admin/profiles/{profile_id}/download", dependencies=[Depends(require_admin)])
+async def download_profile(profile_id: str):
+    """Download the raw cProfile dump (open with pstats or snakeviz)"""
+    path = profiling_service.get_profile_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
 if __name__ == "__main__":
+    # Development server; use serve.py for multi-worker production serving
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
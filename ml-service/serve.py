@@ -0,0 +1,176 @@
+"""
+Production server: prefork workers sharing one copy of the OCR models
+
+The master process loads the FastAPI app (and with it the EasyOCR weights)
+once, binds the listening socket and then forks the workers. Workers inherit
+the already-loaded model pages copy-on-write instead of each loading their own
+copy, and every worker pins torch / OpenMP / OpenCV to its share of the cores.
+Workers that exit are restarted until the master receives SIGTERM / SIGINT.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+
+Unix only (requires os.fork); use `python main.py` for development.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional
+
+from services import runtime
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('serve')
+
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def _bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Listening socket created once in the master and shared by all workers"""
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, threads: int, log_level: str) -> None:
+    """Body of a forked worker; never returns"""
+    import uvicorn
+
+    exit_code = 0
+    try:
+        # Undo the master's handlers; uvicorn installs its own graceful ones
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        runtime.configure_threads(threads)
+
+        config = uvicorn.Config(app, log_level=log_level, access_log=False)
+        uvicorn.Server(config).run(sockets=[sock])
+    except Exception as e:
+        logger.error(f"Worker {os.getpid()} crashed: {str(e)}", exc_info=True)
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+class PreforkServer:
+    def __init__(self, app, sock: socket.socket, workers: int, threads: int, log_level: str):
+        """
+        Supervise forked uvicorn workers
+
+        Args:
+            app: ASGI app loaded in the master (models already in memory)
+            sock: Bound listening socket shared with the workers
+            workers: Number of worker processes
+            threads: Thread budget per worker
+            log_level: uvicorn log level for the workers
+        """
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.threads = threads
+        self.log_level = log_level
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.shutting_down = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.app, self.sock, self.threads, self.log_level)
+        self.children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def _handle_shutdown(self, signum, frame) -> None:
+        if self.shutting_down:
+            return
+        self.shutting_down = True
+        logger.info(f"Received {signal.Signals(signum).name}, stopping {len(self.children)} workers")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._handle_shutdown)
+        signal.signal(signal.SIGINT, self._handle_shutdown)
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            logger.info(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+
+            if not self.shutting_down:
+                if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+                self._spawn()
+
+        self.sock.close()
+        logger.info("All workers stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the OCR API with prefork workers sharing loaded models")
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '8000')))
+    parser.add_argument('-w', '--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '0')) or None,
+                        help="Worker processes (default: one per available core)")
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help="torch / OpenMP / OpenCV threads per worker (default: cores / workers)")
+    parser.add_argument('--backlog', type=int, default=2048)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        parser.error("prefork mode needs os.fork; use `python main.py` on this platform")
+
+    workers = args.workers or runtime.available_cores()
+    threads = args.threads_per_worker or runtime.threads_per_worker(workers)
+
+    # Export the budget before torch / cv2 are imported, then keep the master
+    # itself single-threaded so no OpenMP pool exists when the workers fork.
+    runtime.set_thread_env(threads)
+    import torch
+    torch.set_num_threads(1)
+
+    # Load the app and models once; workers share these pages copy-on-write.
+    # Shared state (the profiling sample rate) is also created here, before fork.
+    from main import app
+
+    sock = _bind_socket(args.host, args.port, args.backlog)
+    logger.info(
+        f"Listening on {args.host}:{args.port} with {workers} workers x {threads} threads"
+    )
+
+    # Move everything loaded so far out of the GC's reach so collections in
+    # the workers don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+    PreforkServer(app, sock, workers, threads, args.log_level).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,17 @@
 # Services package
-from .ocr_service import OCRService
-from .pdf_service import PDFService
+# Exports are resolved lazily so lightweight helpers (services.runtime) can
+# pin thread pools before torch / easyocr are imported.
+import importlib
 
-__all__ = ['OCRService', 'PDFService']
+_EXPORTS = {
+    'OCRService': '.ocr_service',
+    'PDFService': '.pdf_service',
+    'ProfilingService': '.profiling_service'
+}
+
+__all__ = ['OCRService', 'PDFService', 'ProfilingService']
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
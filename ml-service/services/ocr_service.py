@@ -2,16 +2,82 @@ import easyocr
 import requests
 from PIL import Image, ImageEnhance, ImageFilter
 import io
+import os
 import re
+import time
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 import numpy as np
 
+from services import runtime
+from services import tiling as tile_utils
+from services.profiling_service import profiling_active
+
 logger = logging.getLogger(__name__)
 
+# EasyOCR settings shared by whole-image and tiled passes
+READTEXT_PARAMS = {
+    'detail': 1,  # Return detailed results with confidence
+    'paragraph': False,  # Don't merge into paragraphs
+    'min_size': 10,  # Minimum text size to detect
+    'text_threshold': 0.6,  # Lower threshold for better detection
+    'low_text': 0.3,  # Lower text detection threshold
+    'link_threshold': 0.3,  # Lower link threshold
+    'canvas_size': 2560,  # Larger canvas for better quality
+    'mag_ratio': 1.5  # Magnification ratio
+}
+
 class OCRService:
-    def __init__(self):
-        """Initialize EasyOCR reader"""
+    def __init__(
+        self,
+        tiling: Optional[bool] = None,
+        tiling_aspect_ratio: float = 2.0,
+        tiling_min_scale: float = 0.5,
+        tile_size: int = 1600,
+        tile_overlap: int = 200,
+        tile_column_overlap: int = 1200,
+        tile_workers: Optional[int] = None,
+        tile_iou_threshold: float = 0.3
+    ):
+        """
+        Initialize EasyOCR reader
+
+        Args:
+            tiling: Force tiled OCR on (True) or off (False); None decides
+                automatically from how much the single canvas_size pass would
+                shrink the image (see tiling.should_tile)
+            tiling_aspect_ratio: Long/short side ratio from which an image that
+                would be shrunk at all counts as a tall (stitched) scan
+            tiling_min_scale: Tile any image the single pass would shrink
+                below this scale
+            tile_size: Height (px) of each horizontal strip
+            tile_overlap: Overlap (px) between neighbouring strips; should be
+                taller than a line of text so every line fits whole in some strip
+            tile_column_overlap: Minimum overlap (px) between columns, used only
+                for images wider than canvas_size / tiling_min_scale; should be
+                wider than a typical text box
+            tile_workers: Upper bound on tiles processed in parallel; the
+                torch thread budget is split between them (see _readtext_tiled)
+            tile_iou_threshold: Box IoU above which overlapping detections are
+                treated as duplicates
+        """
+        if tile_overlap >= tile_size:
+            raise ValueError("tile_overlap must be smaller than tile_size")
+        # Widest strip EasyOCR still reads at tiling_min_scale or better
+        self.max_strip_width = int(READTEXT_PARAMS['canvas_size'] / tiling_min_scale)
+        if tile_column_overlap >= self.max_strip_width:
+            raise ValueError("tile_column_overlap must be smaller than canvas_size / tiling_min_scale")
+        
+        self.tiling = tiling
+        self.tiling_aspect_ratio = tiling_aspect_ratio
+        self.tiling_min_scale = tiling_min_scale
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_column_overlap = tile_column_overlap
+        self.tile_workers = tile_workers or min(4, runtime.available_cores())
+        self.tile_iou_threshold = tile_iou_threshold
+        
         try:
             # Initialize with English language with better settings
             self.reader = easyocr.Reader(
@@ -77,13 +143,19 @@ class OCRService:
             # Return original image if preprocessing fails
             return image
     
-    async def extract_from_image(self, image_url: str, report_type: str) -> Dict[str, Any]:
+    async def extract_from_image(
+        self,
+        image_url: str,
+        report_type: str,
+        tiling: Optional[bool] = None
+    ) -> Dict[str, Any]:
         """
         Extract health data from image using OCR
         
         Args:
             image_url: URL of the image to process
             report_type: Type of report (blood_test, lipid_profile, etc.)
+            tiling: Per-call override of the service's tiling setting
         
         Returns:
             Dictionary containing extracted health data
@@ -93,25 +165,43 @@ class OCRService:
             response = requests.get(image_url, timeout=30)
             response.raise_for_status()
             
+            return self.extract_from_image_bytes(response.content, report_type, tiling)
+            
+        except Exception as e:
+            logger.error(f"Error extracting from image: {str(e)}")
+            raise
+    
+    def extract_from_image_bytes(
+        self,
+        content: bytes,
+        report_type: str,
+        tiling: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract health data from raw image bytes (already downloaded or read from disk)
+        
+        Args:
+            content: Encoded image file contents
+            report_type: Type of report (blood_test, lipid_profile, etc.)
+            tiling: Per-call override of the service's tiling setting
+        
+        Returns:
+            Dictionary containing extracted health data
+        """
+        try:
             # Open image
-            image = Image.open(io.BytesIO(response.content))
+            image = Image.open(io.BytesIO(content))
             
             # Preprocess image for better OCR
             processed_image = self._preprocess_image(image)
             
-            # Perform OCR with better parameters
+            # Perform OCR (tiled for tall / very large scans)
             logger.info(f"Performing OCR on image for {report_type}")
-            results = self.reader.readtext(
-                np.array(processed_image),
-                detail=1,  # Return detailed results with confidence
-                paragraph=False,  # Don't merge into paragraphs
-                min_size=10,  # Minimum text size to detect
-                text_threshold=0.6,  # Lower threshold for better detection
-                low_text=0.3,  # Lower text detection threshold
-                link_threshold=0.3,  # Lower link threshold
-                canvas_size=2560,  # Larger canvas for better quality
-                mag_ratio=1.5  # Magnification ratio
-            )
+            image_array = np.array(processed_image)
+            if self._should_tile(image_array, tiling):
+                results, tile_timings = self._readtext_tiled(image_array)
+            else:
+                results, tile_timings = self._readtext(image_array), None
             
             # Extract text with better formatting
             extracted_lines = []
@@ -130,6 +220,12 @@ class OCRService:
             confidence = self._calculate_confidence(results)
             parsed_data['confidence'] = confidence
             
+            if tile_timings is not None:
+                parsed_data['tiling'] = {
+                    'tiles': len(tile_timings),
+                    'tileTimings': tile_timings
+                }
+            
             logger.info(f"OCR confidence: {confidence}%")
             
             return parsed_data
@@ -138,6 +234,90 @@ class OCRService:
             logger.error(f"Error extracting from image: {str(e)}")
             raise
     
+    def _readtext(self, image_array: np.ndarray) -> list:
+        """Run EasyOCR detection and recognition on a single image array"""
+        return self.reader.readtext(image_array, **READTEXT_PARAMS)
+    
+    def _should_tile(self, image_array: np.ndarray, tiling: Optional[bool] = None) -> bool:
+        """Decide whether an image should be split into tiles (see tiling.should_tile)"""
+        if tiling is None:
+            tiling = self.tiling
+        if tiling is not None:
+            return tiling
+        
+        height, width = image_array.shape[:2]
+        return tile_utils.should_tile(
+            height, width,
+            READTEXT_PARAMS['canvas_size'], READTEXT_PARAMS['mag_ratio'],
+            self.tiling_aspect_ratio, self.tiling_min_scale
+        )
+    
+    def _readtext_tiled(self, image_array: np.ndarray) -> Tuple[list, List[Dict[str, Any]]]:
+        """
+        Run OCR on overlapping tiles in parallel and merge the detections
+        
+        torch's intra-op threads are process-wide, so the tiles share this
+        process's budget instead of each starting a full-size pool: at most
+        one tile per budget thread runs at once (under serve.py's one thread
+        per worker that means one tile at a time). Boxes are shifted back to full-image coordinates and duplicates in
+        the overlaps are removed by IoU. Detections cut by an inner tile edge
+        are only kept when no neighbouring tile saw the same text whole.
+        
+        Returns:
+            Tuple of (merged EasyOCR results, per-tile timing records)
+        """
+        height, width = image_array.shape[:2]
+        tiles = tile_utils.compute_tiles(
+            height, width, self.tile_size, self.tile_overlap,
+            self.max_strip_width, self.tile_column_overlap
+        )
+        if profiling_active():
+            # Keep detection/recognition on the profiled thread so it shows up
+            workers = 1
+        else:
+            workers = max(1, min(self.tile_workers, runtime.torch_threads(), len(tiles)))
+        logger.info(
+            f"Tiled OCR: {width}x{height} image split into {len(tiles)} tiles "
+            f"({self.tile_size}px, {self.tile_overlap}px overlap, {workers} workers)"
+        )
+        
+        def process_tile(window):
+            x0, y0, x1, y1 = window
+            start = time.perf_counter()
+            tile_results = self._readtext(image_array[y0:y1, x0:x1])
+            elapsed = (time.perf_counter() - start) * 1000
+            return tile_results, elapsed
+        
+        if workers == 1:
+            outputs = [process_tile(window) for window in tiles]
+        else:
+            with runtime.split_threads(workers), ThreadPoolExecutor(max_workers=workers) as executor:
+                outputs = list(executor.map(process_tile, tiles))
+        
+        detections = []
+        tile_timings = []
+        for index, (window, (tile_results, elapsed)) in enumerate(zip(tiles, outputs)):
+            x0, y0, x1, y1 = window
+            # Inner edges only: detections touching the image border are genuine
+            inner_edges = (x0 > 0, y0 > 0, x1 < width, y1 < height)
+            for bbox, text, conf in tile_results:
+                clipped = tile_utils.touches_inner_edge(
+                    tile_utils.box_bounds(bbox), x1 - x0, y1 - y0, inner_edges
+                )
+                shifted = [[float(x) + x0, float(y) + y0] for x, y in bbox]
+                detections.append((shifted, text, conf, clipped))
+            tile_timings.append({
+                'tile': index,
+                'window': [x0, y0, x1, y1],
+                'detections': len(tile_results),
+                'timeMs': round(elapsed, 2)
+            })
+            logger.info(f"Tile {index} {window}: {len(tile_results)} detections in {elapsed:.2f}ms")
+        
+        merged = tile_utils.deduplicate_detections(detections, self.tile_iou_threshold)
+        logger.info(f"Tiled OCR merged {len(detections)} detections into {len(merged)}")
+        return merged, tile_timings
+    
     def _parse_report_text(self, text: str, report_type: str) -> Dict[str, Any]:
         """Parse extracted text based on report type with flexible regex patterns"""
         
@@ -3,15 +3,20 @@ import requests
 import io
 import re
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from services.ocr_service import OCRService
 
 logger = logging.getLogger(__name__)
 
 class PDFService:
-    def __init__(self):
-        """Initialize PDF service"""
-        self.ocr_service = OCRService()
+    def __init__(self, ocr_service: Optional[OCRService] = None):
+        """
+        Initialize PDF service
+        
+        Args:
+            ocr_service: Existing OCRService to share (avoids loading a second EasyOCR model)
+        """
+        self.ocr_service = ocr_service or OCRService()
         logger.info("PDF Service initialized")
     
     async def extract_from_pdf(self, pdf_url: str, report_type: str) -> Dict[str, Any]:
@@ -31,8 +36,26 @@ class PDFService:
             response = requests.get(pdf_url, timeout=30)
             response.raise_for_status()
             
+            return self.extract_from_pdf_bytes(response.content, report_type)
+            
+        except Exception as e:
+            logger.error(f"Error extracting from PDF: {str(e)}")
+            raise
+    
+    def extract_from_pdf_bytes(self, content: bytes, report_type: str) -> Dict[str, Any]:
+        """
+        Extract health data from raw PDF bytes (already downloaded or read from disk)
+        
+        Args:
+            content: PDF file contents
+            report_type: Type of report
+        
+        Returns:
+            Dictionary containing extracted health data
+        """
+        try:
             # Extract text from PDF
-            pdf_file = io.BytesIO(response.content)
+            pdf_file = io.BytesIO(content)
             extracted_text = ""
             
             with pdfplumber.open(pdf_file) as pdf:
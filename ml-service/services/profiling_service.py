@@ -0,0 +1,242 @@
+import cProfile
+import io
+import json
+import logging
+import multiprocessing
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$')
+
+# Marks threads whose work is currently being profiled
+_active = threading.local()
+
+
+def profiling_active() -> bool:
+    """
+    Whether the calling thread is inside ProfilingService.profile()
+
+    cProfile only sees the thread that enabled it, so code that would
+    otherwise fan out to worker threads should run inline while this is True.
+    """
+    return getattr(_active, 'enabled', False)
+
+
+class ProfileRun:
+    """Handle for one profiled request, yielded by ProfilingService.profile()"""
+
+    def __init__(self, profile_id: Optional[str]):
+        # None when profiling was requested but another request holds the profiler
+        self.profile_id = profile_id
+
+
+class ProfilingService:
+    def __init__(
+        self,
+        output_dir: str = 'profiles',
+        sample_rate: float = 0.0,
+        max_profiles: int = 50,
+        top_functions: int = 30,
+        top_allocations: int = 15
+    ):
+        """
+        Initialize on-demand profiling
+
+        Profiling is off unless a request asks for it or falls inside the
+        sampling rate. cProfile and tracemalloc are process-wide, so at most
+        one request is profiled at a time; others run unprofiled.
+
+        Args:
+            output_dir: Directory where .prof dumps and JSON summaries are stored
+            sample_rate: Fraction (0-1) of requests to profile automatically;
+                kept in shared memory so workers forked after construction
+                (serve.py) all see changes made through any one of them
+            max_profiles: Number of profiles kept before the oldest are deleted
+            top_functions: Functions listed in each summary (by cumulative time)
+            top_allocations: Allocation sites listed in each summary
+        """
+        self.output_dir = output_dir
+        self._sample_rate = multiprocessing.Value('d', 0.0, lock=False)
+        self.set_sample_rate(sample_rate)
+        self.max_profiles = max(1, max_profiles)
+        self.top_functions = top_functions
+        self.top_allocations = top_allocations
+        self._lock = threading.Lock()
+        logger.info(f"Profiling Service initialized (sample rate {self.sample_rate})")
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate.value
+
+    def set_sample_rate(self, sample_rate: float) -> None:
+        """Change the sampling rate at runtime (for every forked worker)"""
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self._sample_rate.value = sample_rate
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Decide whether the current request should be profiled"""
+        if requested:
+            return True
+        sample_rate = self._sample_rate.value
+        if sample_rate <= 0.0:
+            return False
+        return random.random() < sample_rate
+
+    @contextmanager
+    def profile(self, label: str):
+        """
+        Profile the enclosed block with cProfile and tracemalloc
+
+        Only code running on the calling thread is captured by cProfile;
+        profiling_active() lets callees keep their work on that thread.
+        Enter this only when should_profile() returned True; the disabled
+        path should use contextlib.nullcontext() so it costs nothing.
+
+        Args:
+            label: Short description stored with the profile (e.g. report type)
+
+        Yields:
+            ProfileRun whose profile_id is set once the profile is saved
+        """
+        if not self._lock.acquire(blocking=False):
+            logger.info(f"Profiler busy, skipping profile for {label}")
+            yield ProfileRun(None)
+            return
+
+        run = ProfileRun(self._new_profile_id())
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profiler = cProfile.Profile()
+            start_time = time.perf_counter()
+            profiler.enable()
+            _active.enabled = True
+            error = None
+            try:
+                yield run
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                _active.enabled = False
+                profiler.disable()
+                wall_time = (time.perf_counter() - start_time) * 1000
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                try:
+                    self._save(run.profile_id, label, profiler, wall_time, current, peak, snapshot, error)
+                except Exception as e:
+                    logger.error(f"Error saving profile {run.profile_id}: {str(e)}")
+                    run.profile_id = None
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+
+    def _new_profile_id(self) -> str:
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        return f"{timestamp}-{uuid.uuid4().hex[:8]}"
+
+    def _save(self, profile_id: str, label: str, profiler: cProfile.Profile, wall_time: float,
+              current: int, peak: int, snapshot: tracemalloc.Snapshot, error: Optional[str]) -> None:
+        """Write the .prof dump and a JSON summary, then prune old profiles"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, 'prof'))
+
+        stats_text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(self.top_functions)
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        allocations = [
+            {
+                'location': str(stat.traceback),
+                'sizeKb': round(stat.size / 1024, 1),
+                'count': stat.count
+            }
+            for stat in snapshot.statistics('lineno')[:self.top_allocations]
+        ]
+
+        summary = {
+            'id': profile_id,
+            'label': label,
+            'createdAt': datetime.now(timezone.utc).isoformat(),
+            'wallTimeMs': round(wall_time, 2),
+            'peakMemoryKb': round(peak / 1024, 1),
+            'retainedMemoryKb': round(current / 1024, 1),
+            'error': error,
+            'topFunctions': stats_text.getvalue(),
+            'topAllocations': allocations
+        }
+        with open(self._path(profile_id, 'json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Saved profile {profile_id} ({wall_time:.2f}ms, peak {peak / 1024:.1f}KB)")
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest profiles beyond max_profiles"""
+        for profile_id in self._profile_ids()[:-self.max_profiles]:
+            for kind in ('prof', 'json'):
+                try:
+                    os.remove(self._path(profile_id, kind))
+                except FileNotFoundError:
+                    pass
+
+    def _path(self, profile_id: str, kind: str) -> str:
+        return os.path.join(self.output_dir, f"{profile_id}.{kind}")
+
+    def _profile_ids(self) -> List[str]:
+        """Stored profile ids, oldest first"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(
+            name[:-len('.json')]
+            for name in os.listdir(self.output_dir)
+            if name.endswith('.json') and PROFILE_ID_PATTERN.match(name[:-len('.json')])
+        )
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """List stored profiles, newest first, without the full stats text"""
+        profiles = []
+        for profile_id in reversed(self._profile_ids()):
+            summary = self.get_summary(profile_id)
+            if summary:
+                summary.pop('topFunctions', None)
+                summary.pop('topAllocations', None)
+                profiles.append(summary)
+        return profiles
+
+    def get_summary(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Load the JSON summary of a stored profile"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, 'json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get_profile_path(self, profile_id: str) -> Optional[str]:
+        """Path of the raw .prof dump (for pstats/snakeviz), if it exists"""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = self._path(profile_id, 'prof')
+        return path if os.path.isfile(path) else None
@@ -0,0 +1,107 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Read by OpenMP / BLAS when torch, numpy and cv2 are first imported
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS'
+)
+
+# Shared by every split_threads() caller in this process
+_split_lock = threading.Lock()
+_split_state = {'workers': 0, 'budget': None}
+
+
+def available_cores() -> int:
+    """CPU cores this process may run on (respects container/affinity limits)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def threads_per_worker(workers: int) -> int:
+    """Split the core budget evenly across worker processes"""
+    return max(1, available_cores() // max(1, workers))
+
+
+def set_thread_env(threads: int) -> None:
+    """
+    Export thread-count variables for native libraries
+
+    Only takes effect for libraries imported after this call, so call it
+    before importing torch / easyocr / cv2 in a fresh process.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+
+def configure_threads(threads: int) -> None:
+    """
+    Pin torch, OpenMP and OpenCV thread pools to a core budget
+
+    Safe to call after torch is imported (e.g. in a forked worker); the
+    environment variables are also set for anything imported later.
+
+    Args:
+        threads: Number of intra-op threads for this process
+    """
+    set_thread_env(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        # Requests already run in parallel across workers
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set once, before any inter-op work
+
+    import cv2
+    cv2.setNumThreads(threads)
+
+    logger.info(f"Thread pools pinned to {threads} threads (pid {os.getpid()})")
+
+
+def torch_threads() -> int:
+    """Current torch intra-op thread budget of this process"""
+    import torch
+    return torch.get_num_threads()
+
+
+@contextmanager
+def split_threads(workers: int):
+    """
+    Share the torch intra-op budget between threads calling torch concurrently
+
+    torch's thread count is process-wide, so N threads each running a model
+    would otherwise start N full-size OpenMP pools and oversubscribe the
+    cores. Inside this block the budget is divided by the number of workers
+    of all concurrent callers; it is restored when the last one leaves.
+
+    Args:
+        workers: Number of threads that will run torch in parallel
+
+    Yields:
+        Threads each worker gets
+    """
+    import torch
+
+    workers = max(1, workers)
+    with _split_lock:
+        if _split_state['workers'] == 0:
+            _split_state['budget'] = torch.get_num_threads()
+        _split_state['workers'] += workers
+        share = max(1, _split_state['budget'] // _split_state['workers'])
+        torch.set_num_threads(share)
+    try:
+        yield share
+    finally:
+        with _split_lock:
+            _split_state['workers'] -= workers
+            remaining = _split_state['workers']
+            torch.set_num_threads(max(1, _split_state['budget'] // max(1, remaining)))
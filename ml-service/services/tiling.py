@@ -0,0 +1,203 @@
+"""
+Geometry helpers for tiled OCR
+
+Pure functions (no numpy / EasyOCR) used by OCRService to decide when to
+tile, lay out the tiles and merge detections from overlapping tiles. Detections follow EasyOCR's (bbox, text, confidence)
+layout, where bbox is a list of four [x, y] corner points.
+"""
+import math
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+Bounds = Tuple[float, float, float, float]
+Window = Tuple[int, int, int, int]
+
+
+def should_tile(height: int, width: int, canvas_size: int, mag_ratio: float,
+                aspect_ratio: float = 2.0, min_scale: float = 0.5) -> bool:
+    """
+    Decide whether a single EasyOCR pass would shrink the text too much
+
+    EasyOCR resizes the image to mag_ratio x its size, capped so the
+    longest side fits canvas_size. Tiling pays off when that cap shrinks
+    the text: for tall scans (aspect ratio >= aspect_ratio) that are shrunk
+    at all, or for any image shrunk below min_scale. A 12 MP phone photo
+    (4032x3024, scale ~0.63) stays a single pass.
+    """
+    long_side, short_side = max(height, width), max(1, min(height, width))
+    scale = min(mag_ratio, canvas_size / long_side)
+    if scale < min_scale:
+        return True
+    return long_side / short_side >= aspect_ratio and scale < 1.0
+
+
+def tile_spans(length: int, size: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    Cover [0, length) with the fewest windows of `size` that overlap by at
+    least `overlap`, spread evenly so no window nearly duplicates its neighbour
+    """
+    if length <= size:
+        return [(0, length)]
+    count = math.ceil((length - overlap) / (size - overlap))
+    step = (length - size) / (count - 1)
+    return [(round(i * step), round(i * step) + size) for i in range(count)]
+
+
+def compute_tiles(height: int, width: int, tile_size: int, tile_overlap: int,
+                  max_strip_width: int, column_overlap: int) -> List[Window]:
+    """
+    Split an image into overlapping tiles
+
+    Images are cut into full-width horizontal strips of tile_size height
+    whenever they are at most max_strip_width wide: word boxes are far wider
+    than a vertical overlap, so a vertical cut leaves both neighbours with
+    only part of a word. Wider images are also split into columns of
+    max_strip_width, overlapping by at least column_overlap so that a whole
+    table cell or text box fits in one of them.
+
+    Returns:
+        List of (x0, y0, x1, y1) tile windows covering the whole image
+    """
+    if width <= max_strip_width:
+        columns = [(0, width)]
+    else:
+        columns = tile_spans(width, max_strip_width, column_overlap)
+    return [
+        (x0, y0, x1, y1)
+        for y0, y1 in tile_spans(height, tile_size, tile_overlap)
+        for x0, x1 in columns
+    ]
+
+
+def box_bounds(box: Sequence[Sequence[float]]) -> Bounds:
+    """Axis-aligned (x0, y0, x1, y1) bounds of an EasyOCR box"""
+    xs = [point[0] for point in box]
+    ys = [point[1] for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def touches_inner_edge(bounds: Bounds, tile_width: int, tile_height: int,
+                       inner_edges: Tuple[bool, bool, bool, bool], margin: int = 2) -> bool:
+    """Check whether tile-local bounds are cut by an edge shared with another tile"""
+    bx0, by0, bx1, by1 = bounds
+    left, top, right, bottom = inner_edges
+    return (
+        (left and bx0 <= margin) or
+        (top and by0 <= margin) or
+        (right and bx1 >= tile_width - margin) or
+        (bottom and by1 >= tile_height - margin)
+    )
+
+
+def box_overlap(a: Bounds, b: Bounds) -> Tuple[float, float]:
+    """
+    Overlap of two boxes
+
+    Returns:
+        Tuple of (IoU, fraction of box a covered by box b)
+    """
+    inter_w = min(a[2], b[2]) - max(a[0], b[0])
+    inter_h = min(a[3], b[3]) - max(a[1], b[1])
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0, 0.0
+
+    intersection = inter_w * inter_h
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    union = area_a + area_b - intersection
+    iou = intersection / union if union > 0 else 0.0
+    coverage = intersection / area_a if area_a > 0 else 0.0
+    return iou, coverage
+
+
+def _cells(bounds: Bounds, cell_size: int) -> List[Tuple[int, int]]:
+    """Grid cells touched by a box"""
+    x0, y0, x1, y1 = bounds
+    return [
+        (cx, cy)
+        for cx in range(int(x0 // cell_size), int(x1 // cell_size) + 1)
+        for cy in range(int(y0 // cell_size), int(y1 // cell_size) + 1)
+    ]
+
+
+def deduplicate_detections(detections: list, iou_threshold: float = 0.3,
+                           coverage_threshold: float = 0.5, cell_size: int = 256) -> list:
+    """
+    Remove duplicate detections from tile overlaps
+
+    Whole detections win over clipped ones, then higher confidence wins.
+    A detection is dropped when its IoU with a kept box exceeds
+    iou_threshold, or when it is clipped and a kept box covers more than
+    coverage_threshold of it. Kept boxes are indexed in a uniform grid, so
+    each detection is only compared with boxes near it.
+
+    Args:
+        detections: (bbox, text, confidence, clipped) tuples in image coordinates
+        iou_threshold: IoU above which two boxes are the same text
+        coverage_threshold: Covered fraction above which a clipped box is dropped
+        cell_size: Grid cell side (px); roughly a few text lines tall
+
+    Returns:
+        Surviving (bbox, text, confidence) tuples in reading order
+    """
+    candidates = sorted(
+        ((box_bounds(bbox), bbox, text, conf, clipped) for bbox, text, conf, clipped in detections),
+        key=lambda c: (not c[4], c[3]),
+        reverse=True
+    )
+
+    kept = []
+    grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    for bounds, bbox, text, conf, clipped in candidates:
+        cells = _cells(bounds, cell_size)
+        checked = set()
+        duplicate = False
+        for cell in cells:
+            for index in grid.get(cell, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                iou, coverage = box_overlap(bounds, kept[index][0])
+                if iou > iou_threshold or (clipped and coverage > coverage_threshold):
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+        if not duplicate:
+            for cell in cells:
+                grid[cell].append(len(kept))
+            kept.append((bounds, (bbox, text, conf)))
+
+    return _sort_bounded(kept)
+
+
+def sort_reading_order(detections: list, ycenter_ths: float = 0.5) -> list:
+    """
+    Order (bbox, text, confidence) detections line by line, left to right
+
+    Boxes join a line when their y-centre lies within ycenter_ths x box
+    height of the line's mean y-centre (as EasyOCR's ycenter_ths), so a
+    value printed slightly higher than its label still follows it.
+    """
+    return _sort_bounded([(box_bounds(d[0]), d) for d in detections], ycenter_ths)
+
+
+def _sort_bounded(items: list, ycenter_ths: float = 0.5) -> list:
+    """sort_reading_order over (bounds, detection) pairs with precomputed bounds"""
+    lines = []  # Each line: [mean y-centre, mean height, (bounds, detection) pairs]
+    for bounds, detection in sorted(items, key=lambda item: item[0][1] + item[0][3]):
+        y_center, height = (bounds[1] + bounds[3]) / 2, bounds[3] - bounds[1]
+        if lines and abs(y_center - lines[-1][0]) <= ycenter_ths * min(height, lines[-1][1]):
+            line = lines[-1]
+            count = len(line[2])
+            line[0] = (line[0] * count + y_center) / (count + 1)
+            line[1] = (line[1] * count + height) / (count + 1)
+            line[2].append((bounds, detection))
+        else:
+            lines.append([y_center, height, [(bounds, detection)]])
+
+    return [
+        detection
+        for _, _, line in lines
+        for _, detection in sorted(line, key=lambda item: item[0][0])
+    ]
@@ -0,0 +1,123 @@
+import random
+import time
+
+from services.tiling import compute_tiles, deduplicate_detections, should_tile, sort_reading_order
+
+
+def box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def texts(detections):
+    return [text for _, text, _ in detections]
+
+
+def test_deduplicate_keeps_most_confident_duplicate():
+    detections = [
+        (box(10, 1400, 300, 1440), 'hb 13', 0.8, False),
+        (box(12, 1401, 301, 1441), 'hb 13', 0.9, False),
+        (box(10, 10, 100, 40), 'name', 0.5, False),
+    ]
+    merged = deduplicate_detections(detections)
+    assert texts(merged) == ['name', 'hb 13']
+    assert merged[1][2] == 0.9
+
+
+def test_deduplicate_prefers_whole_box_over_clipped_fragment():
+    detections = [
+        (box(10, 1400, 150, 1440), 'hemo', 0.99, True),
+        (box(10, 1400, 300, 1440), 'hemoglobin', 0.7, False),
+    ]
+    assert texts(deduplicate_detections(detections)) == ['hemoglobin']
+
+
+def test_deduplicate_keeps_clipped_fragment_without_whole_copy():
+    detections = [(box(10, 1400, 150, 1440), 'hemo', 0.9, True)]
+    assert texts(deduplicate_detections(detections)) == ['hemo']
+
+
+def test_deduplicate_stays_fast_on_long_reports():
+    random.seed(0)
+    detections = []
+    # 1,500 unique boxes (150 lines x 10 words), each seen twice by
+    # neighbouring tiles with slight jitter: 3,000 detections in total
+    for line in range(150):
+        y = line * 40
+        for word in range(10):
+            x = word * 140
+            for _ in range(2):
+                jitter = random.uniform(-2, 2)
+                detections.append((box(x + jitter, y + jitter, x + 120, y + 30), f'w{line}-{word}',
+                                   random.random(), False))
+
+    start = time.perf_counter()
+    merged = deduplicate_detections(detections)
+    elapsed = time.perf_counter() - start
+
+    assert len(merged) == 1500
+    assert elapsed < 1.0
+
+
+def test_sort_reading_order_keeps_values_on_their_label_line():
+    detections = [
+        (box(400, 98, 470, 128), '13.5', 0.9),
+        (box(10, 101, 200, 131), 'Hemoglobin', 0.9),
+        (box(400, 149, 470, 179), '7.2', 0.9),
+        (box(10, 151, 100, 181), 'WBC', 0.9),
+    ]
+    assert texts(sort_reading_order(detections)) == ['Hemoglobin', '13.5', 'WBC', '7.2']
+
+
+def test_sort_reading_order_separates_adjacent_lines():
+    # Tall unit box on line one overlaps line two but its centre stays on line one
+    detections = [
+        (box(300, 140, 360, 170), 'g/dL', 0.9),
+        (box(10, 140, 200, 170), 'Hematocrit', 0.9),
+        (box(300, 100, 360, 150), 'mg', 0.9),
+        (box(10, 110, 200, 140), 'Glucose', 0.9),
+    ]
+    assert texts(sort_reading_order(detections)) == ['Glucose', 'mg', 'Hematocrit', 'g/dL']
+
+
+def test_compute_tiles_spreads_strips_evenly():
+    tiles = compute_tiles(5000, 1500, 1600, 200, 5120, 1200)
+    assert tiles == [
+        (0, 0, 1500, 1600),
+        (0, 1133, 1500, 2733),
+        (0, 2267, 1500, 3867),
+        (0, 3400, 1500, 5000),
+    ]
+
+
+def test_compute_tiles_keeps_a4_600dpi_scan_in_full_width_strips():
+    tiles = compute_tiles(7016, 4960, 1600, 200, 5120, 1200)
+    assert {(x0, x1) for x0, _, x1, _ in tiles} == {(0, 4960)}
+    assert tiles[-1][3] == 7016
+
+
+def test_compute_tiles_uses_wide_column_overlap_as_last_resort():
+    tiles = compute_tiles(3000, 9000, 1600, 200, 5120, 1200)
+    columns = sorted({(x0, x1) for x0, _, x1, _ in tiles})
+    assert columns[0][0] == 0 and columns[-1][1] == 9000
+    for (_, left_end), (right_start, _) in zip(columns, columns[1:]):
+        assert left_end - right_start >= 1200
+
+
+def test_compute_tiles_single_tile_for_small_images():
+    assert compute_tiles(1200, 1000, 1600, 200, 5120, 1200) == [(0, 0, 1000, 1200)]
+
+
+def test_should_tile_leaves_phone_photo_as_single_pass():
+    assert not should_tile(3024, 4032, 2560, 1.5)
+    assert not should_tile(1500, 2000, 2560, 1.5)
+
+
+def test_should_tile_tall_scan_that_would_be_shrunk():
+    assert should_tile(3000, 1500, 2560, 1.5)
+    assert should_tile(5000, 1500, 2560, 1.5)
+    # Tall but small enough to be read at full scale
+    assert not should_tile(2400, 1000, 2560, 1.5)
+
+
+def test_should_tile_any_image_shrunk_below_min_scale():
+    assert should_tile(6000, 8000, 2560, 1.5)